@@ -0,0 +1,96 @@
+# Type hints for the Python bindings, implemented in src/python.rs
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Sequence, Union
+
+_PathArg = Union[str, Path]
+
+def slugify(title: str) -> str: ...
+def get_note_from_markdown(id: Id, contents: str) -> Note: ...
+
+class Id:
+    def __init__(self, s: str) -> None: ...
+    def human_date(self) -> str: ...
+    @classmethod
+    def from_date(cls, date: datetime) -> Id: ...
+    def __eq__(self, other: object) -> bool: ...
+    def __ne__(self, other: object) -> bool: ...
+    def __lt__(self, other: Id) -> bool: ...
+    def __le__(self, other: Id) -> bool: ...
+    def __gt__(self, other: Id) -> bool: ...
+    def __ge__(self, other: Id) -> bool: ...
+    def __hash__(self) -> int: ...
+
+class Metadata:
+    def __init__(
+        self, id: Id, title: str, keywords: List[str], extension: str
+    ) -> None: ...
+    @property
+    def id(self) -> str: ...
+    @property
+    def slug(self) -> str: ...
+    @property
+    def title(self) -> str: ...
+    @property
+    def extension(self) -> str: ...
+    @property
+    def keywords(self) -> List[str]: ...
+    @property
+    def relative_path(self) -> str: ...
+    def __eq__(self, other: object) -> bool: ...
+    def __ne__(self, other: object) -> bool: ...
+    def __lt__(self, other: Metadata) -> bool: ...
+    def __le__(self, other: Metadata) -> bool: ...
+    def __gt__(self, other: Metadata) -> bool: ...
+    def __ge__(self, other: Metadata) -> bool: ...
+    def __hash__(self) -> int: ...
+
+class FrontMatter:
+    @property
+    def title(self) -> str: ...
+    @property
+    def keywords(self) -> List[str]: ...
+    def dump(self) -> str: ...
+    @classmethod
+    def parse(cls, front_matter: str) -> FrontMatter: ...
+    def __eq__(self, other: object) -> bool: ...
+    def __ne__(self, other: object) -> bool: ...
+    def __lt__(self, other: FrontMatter) -> bool: ...
+    def __le__(self, other: FrontMatter) -> bool: ...
+    def __gt__(self, other: FrontMatter) -> bool: ...
+    def __ge__(self, other: FrontMatter) -> bool: ...
+    def __hash__(self) -> int: ...
+
+class Note:
+    def __init__(self, metadata: Metadata, text: str) -> None: ...
+    @property
+    def relative_path(self) -> str: ...
+    @property
+    def front_matter(self) -> FrontMatter: ...
+    @property
+    def metadata(self) -> Metadata: ...
+    @property
+    def id(self) -> str: ...
+    @property
+    def text(self) -> str: ...
+    def dump(self) -> str: ...
+    def __eq__(self, other: object) -> bool: ...
+    def __ne__(self, other: object) -> bool: ...
+    def __lt__(self, other: Note) -> bool: ...
+    def __le__(self, other: Note) -> bool: ...
+    def __gt__(self, other: Note) -> bool: ...
+    def __ge__(self, other: Note) -> bool: ...
+    def __hash__(self) -> int: ...
+
+class NotesRepository:
+    @classmethod
+    def open(cls, base_path: _PathArg) -> NotesRepository: ...
+    @property
+    def base_path(self) -> str: ...
+    def import_from_markdown(self, markdown_path: _PathArg) -> Path: ...
+    def import_directory(self, source_path: _PathArg) -> List[Path]: ...
+    def on_update(self, relative_path: _PathArg) -> Path: ...
+    def load(self, relative_path: _PathArg) -> Note: ...
+    def save(self, note: Note) -> Path: ...
+    def save_many(self, notes: Sequence[Note]) -> List[Path]: ...
@@ -1,9 +1,20 @@
-import shelve
+import itertools
+import json
+import pickle
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import pytest
 
+try:
+    import dbm.gnu as notes_dbm
+except ImportError:
+    try:
+        import dbm.ndbm as notes_dbm
+    except ImportError:
+        import dbm.dumb as notes_dbm
+
 from denote import (
     FrontMatter,
     Id,
@@ -24,6 +35,13 @@ def test_invalid_id():
         id = Id("bad")
 
 
+def test_id_should_only_contain_digits():
+    with pytest.raises(ValueError):
+        Id("2022070lT142708")
+    with pytest.raises(ValueError):
+        Id("20221399T256199")
+
+
 def test_id_ordering():
     id1 = Id("20220707T142708")
     id2 = Id("20220707T142709")
@@ -42,6 +60,13 @@ def test_can_build_id_from_date():
     id = Id.from_date(now)
 
 
+def test_id_from_date_matches_the_date():
+    date = datetime(2022, 7, 7, 14, 27, 8, 892856)
+    id = Id.from_date(date)
+
+    assert str(id) == "20220707T142708"
+
+
 def test_can_build_a_metadata_instance():
     id = Id("20220707T142708")
     metadata = Metadata(id, "This is a title", ["k1", "k2"], "md")
@@ -53,6 +78,13 @@ def test_can_build_a_metadata_instance():
     assert metadata.relative_path == "2022/20220707T142708--this-is-a-title__k1_k2.md"
 
 
+def test_keywords_are_shared_between_metadata_instances():
+    first = Metadata(Id("20220707T142708"), "First", ["python", "rust"], "md")
+    second = Metadata(Id("20220708T152912"), "Second", ["rust"], "md")
+
+    assert first.keywords[1] is second.keywords[0]
+
+
 def test_can_parse_front_matter():
     text = textwrap.dedent(
         """\
@@ -108,6 +140,40 @@ def test_can_create_a_note():
     )
 
 
+def test_note_can_be_pickled():
+    id = Id("20220707T142708")
+    metadata = Metadata(id, "This is a title", ["k1", "k2"], "md")
+    note = Note(text="this is my note\n", metadata=metadata)
+
+    loaded = pickle.loads(pickle.dumps(note, protocol=pickle.HIGHEST_PROTOCOL))
+
+    assert loaded == note
+    assert loaded.relative_path == note.relative_path
+
+
+def test_notes_can_be_used_as_dict_keys():
+    id = Id("20220707T142708")
+    metadata = Metadata(id, "This is a title", ["k1", "k2"], "md")
+    note = Note(text="this is my note\n", metadata=metadata)
+    same_note = Note(text="this is my note\n", metadata=metadata)
+
+    assert hash(note) == hash(same_note)
+    assert {note: 1}[same_note] == 1
+    assert len({id, Id("20220707T142708")}) == 1
+    assert len({metadata, note.metadata}) == 1
+    assert len({note.front_matter, same_note.front_matter}) == 1
+
+
+def test_front_matter_can_be_pickled():
+    id = Id("20220707T142708")
+    metadata = Metadata(id, "This is a title", ["k1", "k2"], "md")
+    front_matter = Note(text="", metadata=metadata).front_matter
+
+    loaded = pickle.loads(pickle.dumps(front_matter))
+
+    assert loaded == front_matter
+
+
 def test_cannot_open_a_repository_from_a_file():
     with pytest.raises(OSError):
         NotesRepository.open(__file__)
@@ -139,6 +205,56 @@ def test_markdown_import(tmp_path):
     assert actual_without_date == expected_without_date
 
 
+def write_markdown(path, title, text):
+    date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    contents = textwrap.dedent(
+        f"""\
+        ---
+        title: {title}
+        date: {date}
+        keywords: k1 k2
+        ---
+        {text}
+        """
+    )
+    path.write_text(contents)
+
+
+def test_markdown_import_from_several_threads(tmp_path):
+    notes_repository = NotesRepository.open(tmp_path)
+    markdown_paths = []
+    for i in range(10):
+        markdown_path = tmp_path / f"note-{i}.md"
+        # Note: same title for all notes, so that only the Ids can
+        # tell the saved paths apart
+        write_markdown(markdown_path, "Same title", f"this is note {i}")
+        markdown_paths.append(markdown_path)
+
+    with ThreadPoolExecutor() as executor:
+        saved_paths = list(
+            executor.map(notes_repository.import_from_markdown, markdown_paths)
+        )
+
+    ids = {notes_repository.load(saved_path).id for saved_path in saved_paths}
+    assert len(ids) == 10
+
+
+def test_import_directory(tmp_path):
+    source_path = tmp_path / "source"
+    source_path.mkdir()
+    for i in range(3):
+        write_markdown(source_path / f"note-{i}.md", "Same title", f"this is note {i}")
+    (source_path / "not-a-note.txt").write_text("")
+    (source_path / "not-a-note.md").mkdir()
+    notes_repository = NotesRepository.open(tmp_path)
+
+    saved_paths = notes_repository.import_directory(source_path)
+
+    ids = {notes_repository.load(saved_path).id for saved_path in saved_paths}
+    assert len(saved_paths) == 3
+    assert len(ids) == 3
+
+
 def test_loading_and_saving(tmp_path):
     id = Id("20220707T142708")
     metadata = Metadata(id, "This is a title", ["k1", "k2"], "md")
@@ -152,6 +268,22 @@ def test_loading_and_saving(tmp_path):
     notes_repository.load(relative_path)
 
 
+def test_save_many_notes(tmp_path):
+    first_metadata = Metadata(Id("20220707T142708"), "First", ["one"], "md")
+    first_note = Note(text="first note\n", metadata=first_metadata)
+    second_metadata = Metadata(Id("20230708T152912"), "Second", ["two"], "md")
+    second_note = Note(text="second note\n", metadata=second_metadata)
+
+    notes_repository = NotesRepository.open(tmp_path)
+    saved_paths = notes_repository.save_many([first_note, second_note])
+
+    assert [str(p) for p in saved_paths] == [
+        first_note.relative_path,
+        second_note.relative_path,
+    ]
+    assert notes_repository.load(saved_paths[1]) == second_note
+
+
 def test_update_note_path_when_title_changes(tmp_path):
     id = Id("20220707T142708")
     metadata = Metadata(id, "old title", ["k1", "k2"], "md")
@@ -191,24 +323,62 @@ def test_update_note_path_when_keywords_change(tmp_path):
 
 
 class NoteShelf:
+    # Note: bump this when the format of the records changes
+    FORMAT_VERSION = b"\x01"
+
     def __init__(self, shelve_path):
         self.shelve_path = shelve_path
 
+    @classmethod
+    def dump_note(cls, note):
+        metadata = note.metadata
+        fields = {
+            "id": note.id,
+            "title": metadata.title,
+            "keywords": metadata.keywords,
+            "extension": metadata.extension,
+            "text": note.text,
+        }
+        return cls.FORMAT_VERSION + json.dumps(fields).encode()
+
+    @classmethod
+    def load_note(cls, record):
+        version, payload = record[:1], record[1:]
+        if version != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported note record version: {version!r}")
+        fields = json.loads(payload)
+        metadata = Metadata(
+            Id(fields["id"]), fields["title"], fields["keywords"], fields["extension"]
+        )
+        return Note(text=fields["text"], metadata=metadata)
+
     def __enter__(self):
-        self.db = shelve.open(self.shelve_path)
+        self.db = notes_dbm.open(self.shelve_path, "c")
         return self
 
     def save(self, note):
-        self.db[note.id] = note.dump()
+        self.db[note.id.encode()] = self.dump_note(note)
+
+    def save_many(self, notes):
+        for note in notes:
+            self.save(note)
 
     def load(self, id):
-        markdown = self.db[str(id)]
-        return get_note_from_markdown(id, markdown)
+        return self.load_note(self.db[str(id).encode()])
+
+    def notes_batched(self, batch_size=64):
+        keys = iter(self.db.keys())
+        while True:
+            batch = [
+                self.load_note(self.db[key])
+                for key in itertools.islice(keys, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch
 
     def notes(self):
-        for id_s, markdown in self.db.items():
-            id = Id(id_s)
-            yield get_note_from_markdown(id, markdown)
+        return itertools.chain.from_iterable(self.notes_batched())
 
     def __exit__(self, *args):
         self.db.close()
@@ -274,3 +444,21 @@ def test_add_two_notes_in_shelf(tmp_path):
         saved = list(shelf.notes())
 
     assert sorted(saved) == [first_note, second_note]
+
+
+def test_iterate_over_notes_in_shelf_by_batches(tmp_path):
+    shelve_path = str(tmp_path / "notes.shelve")
+
+    notes = []
+    for i in range(5):
+        id = Id(f"2022070{i + 1}T142708")
+        metadata = Metadata(id, f"Note {i}", ["k1"], "md")
+        notes.append(Note(text="", metadata=metadata))
+
+    with NoteShelf(shelve_path) as shelf:
+        shelf.save_many(notes)
+
+    with NoteShelf(shelve_path) as shelf:
+        batches = list(shelf.notes_batched(batch_size=2))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
@@ -1,6 +1,9 @@
 use std::{
+    collections::{HashMap, HashSet},
+    io::Write,
     path::{Path, PathBuf},
     str::FromStr,
+    sync::Mutex,
 };
 
 use lazy_static::lazy_static;
@@ -8,7 +11,7 @@ use regex::{Regex, RegexBuilder};
 use serde::{Deserialize, Serialize};
 use thiserror::Error;
 use time::macros::format_description;
-use time::OffsetDateTime;
+use time::{Date, Month, OffsetDateTime, PrimitiveDateTime, Time};
 
 /// Tools for command-line usage
 pub mod cli;
@@ -108,20 +111,19 @@ pub fn parse_file_name(name: &str) -> Result<FileInfo> {
 }
 
 fn parse_front_matter(contents: &str) -> Result<(FrontMatter, String)> {
-    let docs: Vec<_> = contents.splitn(3, "---\n").collect();
-    if docs.is_empty() {
-        return Err(Error::ParseError("Missing front matter".to_string()));
-    }
-    if docs.len() < 2 {
-        return Err(Error::ParseError("Unfinished front matter".to_string()));
-    }
-    let first_doc = &docs[1];
-    let text = docs[2];
+    // Note: split the contents in place instead of collecting
+    // all the parts in a Vec
+    let (_, rest) = contents
+        .split_once("---\n")
+        .ok_or_else(|| Error::ParseError("Missing front matter".to_string()))?;
+    let (first_doc, text) = rest
+        .split_once("---\n")
+        .ok_or_else(|| Error::ParseError("Unfinished front matter".to_string()))?;
     let front_matter = FrontMatter::parse(first_doc)?;
     Ok((front_matter, text.to_string()))
 }
 
-#[derive(Debug, Clone, Eq, PartialEq, PartialOrd, Ord, Deserialize, Serialize)]
+#[derive(Debug, Clone, Eq, PartialEq, PartialOrd, Ord, Hash, Deserialize, Serialize)]
 /// A new-type on top of String so that only valid Ids can
 /// be used
 /// As a reminder, the Id in denote is YYYYMMDDTHHMMSS
@@ -133,17 +135,30 @@ impl Id {
     }
 
     pub fn human_date(&self) -> String {
-        let ymd = &self.0[0..8];
-        let year = &ymd[0..4];
-        let month = &ymd[4..6];
-        let day = &ymd[6..8];
-
-        let hms = &self.0[9..];
-        let hours = &hms[0..2];
-        let minutes = &hms[2..4];
-        let seconds = &hms[4..6];
+        // Note: the Id is always 15 ASCII characters long (this is
+        // checked in from_str()), so we can slice it directly
+        let id = self.as_str();
+        let mut res = String::with_capacity(19);
+        res.push_str(&id[0..4]);
+        res.push('-');
+        res.push_str(&id[4..6]);
+        res.push('-');
+        res.push_str(&id[6..8]);
+        res.push(' ');
+        res.push_str(&id[9..11]);
+        res.push(':');
+        res.push_str(&id[11..13]);
+        res.push(':');
+        res.push_str(&id[13..15]);
+        res
+    }
 
-        format!("{year}-{month}-{day} {hours}:{minutes}:{seconds}")
+    /// Unix timestamp of the Id, read as an UTC date
+    fn timestamp(&self) -> i64 {
+        parse_date(self.as_str())
+            .expect("id should be a valid date")
+            .assume_utc()
+            .unix_timestamp()
     }
 
     pub fn from_date(offsett_date_time: &OffsetDateTime) -> Self {
@@ -157,27 +172,56 @@ impl FromStr for Id {
     type Err = Error;
 
     fn from_str(s: &str) -> Result<Self> {
-        let chars: Vec<char> = s.chars().collect();
+        if !s.is_ascii() || s.len() != 15 {
+            return Err(ParseError(format!(
+                "value '{s}' should contain 15 ASCII characters, got {}",
+                s.chars().count()
+            )));
+        }
 
-        if chars.len() != 15 {
+        let middle = s.as_bytes()[8];
+        if middle != b'T' {
             return Err(ParseError(format!(
-                "value '{s}' should contain 15 characters, got {})",
-                chars.len()
+                "value '{s}' should contain a 'T' in the middle, got '{}'",
+                middle as char
             )));
         }
 
-        if chars[8] != 'T' {
+        let only_digits = s
+            .bytes()
+            .enumerate()
+            .all(|(i, b)| i == 8 || b.is_ascii_digit());
+        if !only_digits {
             return Err(ParseError(format!(
-                "value '{s}' should contain contain a 'T' in the middle, got {})",
-                chars[6]
+                "value '{s}' should only contain digits around the 'T'"
             )));
         }
 
+        // Note: the format is fixed, so the fields can be sliced directly
+        // and checked by building the date - no need for a format parser
+        parse_date(s).map_err(|e| ParseError(format!("value '{s}' is not a valid date: {e}")))?;
+
         Ok(Self(s.to_string()))
     }
 }
 
-#[derive(Debug, Clone, PartialEq, Eq, Deserialize, Serialize)]
+/// Build the date from an Id that is known to contain 15 ASCII digits
+/// around a 'T'
+fn parse_date(id: &str) -> std::result::Result<PrimitiveDateTime, time::error::ComponentRange> {
+    let field = |start: usize, end: usize| -> u16 {
+        id[start..end]
+            .parse()
+            .expect("id fields should only contain digits")
+    };
+    let month = Month::try_from(field(4, 6) as u8)?;
+    let date = Date::from_calendar_date(field(0, 4) as i32, month, field(6, 8) as u8)?;
+    let time = Time::from_hms(field(9, 11) as u8, field(11, 13) as u8, field(13, 15) as u8)?;
+    Ok(PrimitiveDateTime::new(date, time))
+}
+
+// Note: no Deserialize here - the derived fields would be missing,
+// use Metadata::new() instead
+#[derive(Debug, Clone, PartialEq, Eq, Hash, Serialize)]
 /// Contain all the metadata about a note.
 /// Some of it come from the front matter, like the title,
 /// but some other come from the filename, like the slug, the extension,
@@ -188,18 +232,52 @@ pub struct Metadata {
     slug: String,
     keywords: Vec<String>,
     extension: String,
+    // Derived from all the above - kept in sync by `Metadata::refresh`
+    #[serde(skip)]
+    relative_path: PathBuf,
+}
+
+fn build_relative_path(id: &Id, slug: &str, keywords: &[String], extension: &str) -> PathBuf {
+    let id = id.as_str();
+    let year = &id[0..4];
+    let year_path = PathBuf::from_str(year).expect("year should be ascii");
+
+    let keywords = keywords.join("_");
+
+    let file_path = PathBuf::from_str(&format!("{id}--{slug}__{keywords}.{extension}"))
+        .expect("filename should be valid utf-8");
+
+    year_path.join(file_path)
 }
 
 impl Metadata {
     pub fn new(id: Id, title: String, keywords: Vec<String>, extension: String) -> Metadata {
         let slug = slug::slugify(&title);
-        Metadata {
+        let mut metadata = Metadata {
             id,
             title,
             slug,
             keywords,
             extension,
-        }
+            relative_path: PathBuf::new(),
+        };
+        metadata.refresh();
+        metadata
+    }
+
+    /// Update the title and the keywords, and everything that
+    /// depends on them
+    pub fn update(&mut self, front_matter: &FrontMatter) {
+        self.title = front_matter.title.to_string();
+        self.slug = front_matter.slug();
+        self.keywords = front_matter.keywords();
+        self.refresh();
+    }
+
+    /// Compute the relative path once, instead of every time it is used
+    fn refresh(&mut self) {
+        self.relative_path =
+            build_relative_path(&self.id, &self.slug, &self.keywords, &self.extension);
     }
 
     pub fn id(&self) -> &str {
@@ -230,29 +308,12 @@ impl Metadata {
         }
     }
 
-    pub fn relative_path(&self) -> PathBuf {
-        let Metadata {
-            id,
-            keywords,
-            slug,
-            extension,
-            ..
-        } = self;
-
-        let id = id.as_str();
-        let year = &id[0..4];
-        let year_path = PathBuf::from_str(year).expect("year should be ascii");
-
-        let keywords = keywords.join("_");
-
-        let file_path = PathBuf::from_str(&format!("{id}--{slug}__{keywords}.{extension}"))
-            .expect("filename should be valid utf-8");
-
-        year_path.join(file_path)
+    pub fn relative_path(&self) -> &Path {
+        &self.relative_path
     }
 }
 
-#[derive(Debug, Clone, Eq, PartialEq, Deserialize, Serialize)]
+#[derive(Debug, Clone, Eq, PartialEq, Hash, Deserialize, Serialize)]
 /// The front matter of a note.
 /// Currently using YAML
 /// Note that `keywords` is list of words separated by spaces,
@@ -274,24 +335,229 @@ impl FrontMatter {
         self.keywords.split(' ').map(|x| x.to_string()).collect()
     }
 
+    /// Dump the front matter as YAML, quoting the values only
+    /// when required, with the same quoting rules as serde_yaml.
+    /// The output can be read back by `parse`. It is the same as
+    /// serde_yaml's only when the values contain no control characters
+    /// and none of NEL, NBSP, LS or PS, because the escape sequences
+    /// used for them differ
     pub fn dump(&self) -> String {
-        serde_yaml::to_string(self).expect("front matter should always be serializable")
+        let fields = [
+            ("title", &self.title),
+            ("date", &self.date),
+            ("keywords", &self.keywords),
+        ];
+        let values_len: usize = fields.iter().map(|(_, value)| value.len()).sum();
+        // Room for the separator, the keys, and the quotes
+        let mut res = String::with_capacity(values_len + 40);
+        res.push_str("---\n");
+        for (key, value) in fields {
+            res.push_str(key);
+            res.push_str(": ");
+            push_front_matter_value(&mut res, value);
+            res.push('\n');
+        }
+        res
     }
 
     pub fn slug(&self) -> String {
         slug::slugify(&self.title)
     }
 
+    /// Parse the front matter line by line: it only contains
+    /// `key: value` lines, so there's no need for a full YAML parser.
+    /// Unknown keys are ignored, and the leading `---` is optional
     pub fn parse(front_matter: &str) -> Result<Self> {
-        serde_yaml::from_str(front_matter).map_err(|e| {
-            ParseError(format!(
-                "could not deserialize front matter\n{front_matter}\n{e})"
-            ))
+        let mut title = None;
+        let mut date = None;
+        let mut keywords = None;
+
+        for line in front_matter.lines() {
+            let line = line.trim_end_matches(is_yaml_space);
+            if line.is_empty() || line.starts_with('#') {
+                continue;
+            }
+            if line == "---" {
+                if title.is_none() && date.is_none() && keywords.is_none() {
+                    continue;
+                }
+                break;
+            }
+            let (key, value) = line.split_once(':').ok_or_else(|| {
+                ParseError(format!(
+                    "could not parse front matter line '{line}', expecting 'key: value'"
+                ))
+            })?;
+            let value = parse_front_matter_value(value)?;
+            match key.trim() {
+                "title" => title = Some(value),
+                "date" => date = Some(value),
+                "keywords" => keywords = Some(value),
+                _ => (),
+            }
+        }
+
+        let missing =
+            |field: &str| ParseError(format!("missing '{field}' in front matter\n{front_matter}"));
+        Ok(Self {
+            title: title.ok_or_else(|| missing("title"))?,
+            date: date.ok_or_else(|| missing("date"))?,
+            keywords: keywords.ok_or_else(|| missing("keywords"))?,
+        })
+    }
+}
+
+/// Same rules as yaml-rust's emitter (used by serde_yaml): quote strings
+/// that would otherwise be read as something else than a plain string
+fn needs_quotes(value: &str) -> bool {
+    value.is_empty()
+        || value.starts_with(' ')
+        || value.ends_with(' ')
+        || value.starts_with(|c: char| {
+            matches!(
+                c,
+                '&' | '*' | '?' | '|' | '-' | '<' | '>' | '=' | '!' | '%' | '@' | '.'
+            )
+        })
+        || value.contains(|c: char| {
+            matches!(
+                c,
+                ':' | '{'
+                    | '}'
+                    | '['
+                    | ']'
+                    | ','
+                    | '#'
+                    | '`'
+                    | '"'
+                    | '\''
+                    | '\\'
+                    | '\0'..='\x06'
+                    | '\t'
+                    | '\n'
+                    | '\r'
+                    | '\x0e'..='\x1a'
+                    | '\x1c'..='\x1f'
+            )
         })
+        || [
+            "yes", "Yes", "YES", "no", "No", "NO", "True", "TRUE", "true", "False", "FALSE",
+            "false", "on", "On", "ON", "off", "Off", "OFF", "null", "Null", "NULL", "~",
+        ]
+        .contains(&value)
+        || value.starts_with("0x")
+        || value.parse::<i64>().is_ok()
+        || value.parse::<f64>().is_ok()
+}
+
+/// Push the value, in double quotes and with the escape sequences
+/// understood by `unescape_double_quoted` if needed
+fn push_front_matter_value(res: &mut String, value: &str) {
+    if !needs_quotes(value) {
+        res.push_str(value);
+        return;
+    }
+    res.push('"');
+    for c in value.chars() {
+        match c {
+            '"' => res.push_str("\\\""),
+            '\\' => res.push_str("\\\\"),
+            '\0' => res.push_str("\\0"),
+            '\x07' => res.push_str("\\a"),
+            '\x08' => res.push_str("\\b"),
+            '\t' => res.push_str("\\t"),
+            '\n' => res.push_str("\\n"),
+            '\x0b' => res.push_str("\\v"),
+            '\x0c' => res.push_str("\\f"),
+            '\r' => res.push_str("\\r"),
+            '\x1b' => res.push_str("\\e"),
+            '\u{85}' => res.push_str("\\N"),
+            '\u{a0}' => res.push_str("\\_"),
+            '\u{2028}' => res.push_str("\\L"),
+            '\u{2029}' => res.push_str("\\P"),
+            c if c.is_control() => res.push_str(&format!("\\u{:04x}", c as u32)),
+            c => res.push(c),
+        }
+    }
+    res.push('"');
+}
+
+/// Only spaces and tabs separate tokens in YAML - other Unicode
+/// whitespace is part of the value
+fn is_yaml_space(c: char) -> bool {
+    c == ' ' || c == '\t'
+}
+
+/// Value of a front matter line, without the quotes if it has some
+/// (dump() for instance adds double quotes around dates)
+fn parse_front_matter_value(value: &str) -> Result<String> {
+    let value = value.trim_matches(is_yaml_space);
+    if let Some(quoted) = value.strip_prefix('"') {
+        let quoted = quoted
+            .strip_suffix('"')
+            .ok_or_else(|| ParseError(format!("unterminated double quotes in {value}")))?;
+        return unescape_double_quoted(quoted);
+    }
+    if let Some(quoted) = value.strip_prefix('\'') {
+        let quoted = quoted
+            .strip_suffix('\'')
+            .ok_or_else(|| ParseError(format!("unterminated single quotes in {value}")))?;
+        return Ok(quoted.replace("''", "'"));
+    }
+    Ok(value.to_string())
+}
+
+/// Handle the escape sequences allowed in YAML double-quoted strings
+fn unescape_double_quoted(quoted: &str) -> Result<String> {
+    let invalid = || ParseError(format!("invalid escape sequence in \"{quoted}\""));
+    let mut res = String::with_capacity(quoted.len());
+    let mut chars = quoted.chars();
+    while let Some(c) = chars.next() {
+        if c != '\\' {
+            res.push(c);
+            continue;
+        }
+        let unescaped = match chars.next().ok_or_else(invalid)? {
+            '0' => '\0',
+            'a' => '\x07',
+            'b' => '\x08',
+            't' | '\t' => '\t',
+            'n' => '\n',
+            'v' => '\x0b',
+            'f' => '\x0c',
+            'r' => '\r',
+            'e' => '\x1b',
+            ' ' => ' ',
+            '"' => '"',
+            '/' => '/',
+            '\\' => '\\',
+            'N' => '\u{85}',
+            '_' => '\u{a0}',
+            'L' => '\u{2028}',
+            'P' => '\u{2029}',
+            prefix @ ('x' | 'u' | 'U') => {
+                let len = match prefix {
+                    'x' => 2,
+                    'u' => 4,
+                    _ => 8,
+                };
+                let hex: String = chars.by_ref().take(len).collect();
+                if hex.len() != len {
+                    return Err(invalid());
+                }
+                u32::from_str_radix(&hex, 16)
+                    .ok()
+                    .and_then(char::from_u32)
+                    .ok_or_else(invalid)?
+            }
+            _ => return Err(invalid()),
+        };
+        res.push(unescaped);
     }
+    Ok(res)
 }
 
-#[derive(Debug, Clone, Eq, PartialEq, Serialize)]
+#[derive(Debug, Clone, Eq, PartialEq, Hash, Serialize)]
 /// A Note has some metadata and some text
 /// Note that the metada is different from the frontmatter, it does
 /// contain exacly the same data
@@ -305,7 +571,7 @@ impl Note {
         Self { metadata, text }
     }
 
-    fn relative_path(&self) -> PathBuf {
+    fn relative_path(&self) -> &Path {
         self.metadata.relative_path()
     }
 
@@ -315,9 +581,7 @@ impl Note {
 
     /// Update the metadata when the front matter changes
     pub fn update(&mut self, front_matter: &FrontMatter) {
-        self.metadata.title = front_matter.title.to_string();
-        self.metadata.slug = front_matter.slug();
-        self.metadata.keywords = front_matter.keywords();
+        self.metadata.update(front_matter)
     }
 
     pub fn metadata(&self) -> &Metadata {
@@ -328,11 +592,15 @@ impl Note {
         self.metadata.id()
     }
 
+    pub fn text(&self) -> &str {
+        &self.text
+    }
+
     pub fn dump(&self) -> String {
-        let mut res = String::new();
-        // Note: serde_yaml writes a leading `---`
-        let front_matter = self.metadata.front_matter();
-        res.push_str(&front_matter.dump());
+        // Note: the dumped front matter starts with a leading `---`
+        let front_matter = self.metadata.front_matter().dump();
+        let mut res = String::with_capacity(front_matter.len() + 4 + self.text.len());
+        res.push_str(&front_matter);
         res.push_str("---\n");
         res.push_str(&self.text);
         res
@@ -342,15 +610,8 @@ impl Note {
 fn get_note_from_markdown(id: Id, contents: String) -> Result<Note> {
     let (front_matter, text) = parse_front_matter(&contents)?;
     let title = front_matter.title.to_string();
-    let slug = front_matter.slug();
     let keywords = front_matter.keywords();
-    let metadata = Metadata {
-        id,
-        title,
-        slug,
-        keywords,
-        extension: "md".to_string(),
-    };
+    let metadata = Metadata::new(id, title, keywords, "md".to_string());
     Ok(Note { metadata, text })
 }
 
@@ -358,6 +619,8 @@ fn get_note_from_markdown(id: Id, contents: String) -> Result<Note> {
 /// Store the notes with the proper file names inside a `base_path`
 pub struct NotesRepository {
     base_path: PathBuf,
+    // Unix timestamp of the last Id returned by `new_ids`
+    last_id_timestamp: Mutex<i64>,
 }
 
 impl NotesRepository {
@@ -374,6 +637,7 @@ impl NotesRepository {
         }
         Ok(NotesRepository {
             base_path: base_path.to_owned(),
+            last_id_timestamp: Mutex::new(0),
         })
     }
 
@@ -386,14 +650,113 @@ impl NotesRepository {
     /// Import a plain md file and save it with the correct name
     /// Called by cli::new_note
     pub fn import_from_markdown(&self, markdown_path: &Path) -> Result<PathBuf> {
+        let id = self.new_ids(1)?.remove(0);
+        self.import_with_id(markdown_path, id)
+    }
+
+    /// Import all the `.md` files found in `source_path` (but not in its
+    /// sub-directories), using one thread per CPU
+    /// Each note gets its own Id, following the order of the file names
+    /// Return the paths of the saved notes
+    ///
+    /// If an import fails, the first error is returned, but the notes
+    /// already imported (by this thread or the other ones) are left
+    /// in the repository
+    pub fn import_directory(&self, source_path: &Path) -> Result<Vec<PathBuf>> {
+        let entries = std::fs::read_dir(source_path)
+            .map_err(|e| OSError(format!("While reading {source_path:?}: {e}")))?;
+        let mut markdown_paths = vec![];
+        for entry in entries {
+            let entry =
+                entry.map_err(|e| OSError(format!("While reading {source_path:?}: {e}")))?;
+            let file_type = entry
+                .file_type()
+                .map_err(|e| OSError(format!("While reading {source_path:?}: {e}")))?;
+            let path = entry.path();
+            if file_type.is_file() && path.extension() == Some("md".as_ref()) {
+                markdown_paths.push(path);
+            }
+        }
+        markdown_paths.sort();
+
+        // Note: the Ids are handed out before starting the threads,
+        // otherwise all the notes imported during the same second
+        // would get the same Id
+        let ids = self.new_ids(markdown_paths.len())?;
+        let imports: Vec<_> = markdown_paths.into_iter().zip(ids).collect();
+        map_in_threads(&imports, |(path, id)| self.import_with_id(path, id.clone()))
+    }
+
+    /// Return `count` distinct Ids, one second apart, starting from now,
+    /// or from right after the last Id used if it is more recent -
+    /// either returned by this instance, or found in the repository
+    /// (a bulk import uses Ids in the future, and an other instance
+    /// or process may have saved notes since)
+    fn new_ids(&self, count: usize) -> Result<Vec<Id>> {
+        let mut last_id_timestamp = self
+            .last_id_timestamp
+            .lock()
+            .expect("last id timestamp should not be poisoned");
+        let now = OffsetDateTime::now_utc().unix_timestamp();
+        let mut start = now.max(*last_id_timestamp + 1);
+        let start_year = OffsetDateTime::from_unix_timestamp(start)
+            .expect("timestamp should be in range")
+            .year();
+        if let Some(last_saved_id) = self.last_saved_id(start_year)? {
+            start = start.max(last_saved_id.timestamp() + 1);
+        }
+        let ids: Vec<Id> = (0..count as i64)
+            .map(|i| {
+                let date = OffsetDateTime::from_unix_timestamp(start + i)
+                    .expect("timestamp should be in range");
+                Id::from_date(&date)
+            })
+            .collect();
+        *last_id_timestamp = start + count as i64 - 1;
+        Ok(ids)
+    }
+
+    /// Largest Id of the notes found in the `<year>` directories,
+    /// starting from `since_year` - older notes cannot conflict
+    /// with new Ids
+    fn last_saved_id(&self, since_year: i32) -> Result<Option<Id>> {
+        let read_dir = |path: &Path| {
+            std::fs::read_dir(path).map_err(|e| OSError(format!("While reading {path:?}: {e}")))
+        };
+        let mut last_id: Option<Id> = None;
+        for year_entry in read_dir(&self.base_path)? {
+            let year_entry = year_entry.map_err(|e| OSError(format!("While reading: {e}")))?;
+            let year = year_entry
+                .file_name()
+                .to_str()
+                .and_then(|name| name.parse::<i32>().ok());
+            let is_recent_year = matches!(year, Some(year) if year >= since_year);
+            let year_path = year_entry.path();
+            if !is_recent_year || !year_path.is_dir() {
+                continue;
+            }
+            for entry in read_dir(&year_path)? {
+                let entry = entry.map_err(|e| OSError(format!("While reading: {e}")))?;
+                // Note: files not following the naming convention are
+                // not notes, and are skipped
+                let info = match entry.file_name().to_str().map(parse_file_name) {
+                    Some(Ok(info)) => info,
+                    _ => continue,
+                };
+                last_id = last_id.max(Some(info.id));
+            }
+        }
+        Ok(last_id)
+    }
+
+    fn import_with_id(&self, markdown_path: &Path, id: Id) -> Result<PathBuf> {
         let contents = std::fs::read_to_string(markdown_path)
             .map_err(|e| Error::OSError(format!("while reading: {markdown_path:#?}: {e}")))?;
-        let now = OffsetDateTime::now_utc();
-        let id = Id::from_date(&now);
 
         let note = get_note_from_markdown(id, contents)
             .map_err(|e| Error::OSError(format!("invalid contents for {markdown_path:#?}: {e}")))?;
-        self.save(&note)
+        create_year_path(&self.year_path(&note))?;
+        self.write_new_note(&note)
     }
 
     /// To be called when the markdown file has changed - this will
@@ -405,7 +768,7 @@ impl NotesRepository {
         let note = self.load(relative_path)?;
 
         let new_relative_path = note.relative_path();
-        let new_full_path = &self.base_path.join(&new_relative_path);
+        let new_full_path = &self.base_path.join(new_relative_path);
         if full_path != new_full_path {
             println!("{full_path:#?} -> {new_full_path:#?}");
             std::fs::rename(full_path, new_full_path)
@@ -434,32 +797,136 @@ impl NotesRepository {
     /// Save a note in the repository
     /// Create `<year>` directory when needed
     pub fn save(&self, note: &Note) -> Result<PathBuf> {
-        let relative_path = &note.relative_path();
-        let full_path = &self.base_path.join(relative_path);
-
-        let parent_path = full_path.parent().expect("full path should have a parent");
+        create_year_path(&self.year_path(note))?;
+        self.write_note(note)
+    }
 
-        if parent_path.exists() {
-            if parent_path.is_file() {
-                return Err(OSError(format!(
-                    "Cannot use {parent_path:?} as year path because there's a file here)"
-                )));
+    /// Save several notes in the repository
+    /// Each `<year>` directory is checked only once, and the notes
+    /// are written using one thread per CPU
+    /// If several notes have the same path, the last one wins, like
+    /// when calling `save` for each note
+    /// Return the path of each note, in the same order
+    pub fn save_many(&self, notes: &[&Note]) -> Result<Vec<PathBuf>> {
+        let mut year_paths = HashSet::new();
+        for note in notes {
+            let year_path = self.year_path(note);
+            if !year_paths.contains(&year_path) {
+                create_year_path(&year_path)?;
+                year_paths.insert(year_path);
             }
-        } else {
-            println!("Creating {parent_path:?}");
-            std::fs::create_dir_all(&parent_path).map_err(|e| {
-                OSError(format!(
-                    "While creating parent path {parent_path:?}for note :{e}"
-                ))
-            })?;
         }
 
-        let to_write = note.dump();
+        // Note: two threads writing to the same file at once could
+        // mix up the contents of the two notes
+        let to_write = last_note_per_path(notes);
+        map_in_threads(&to_write, |note| self.write_note(note))?;
+
+        Ok(notes
+            .iter()
+            .map(|note| note.relative_path().to_path_buf())
+            .collect())
+    }
+
+    fn year_path(&self, note: &Note) -> PathBuf {
+        let relative_path = note.relative_path();
+        let year = relative_path
+            .parent()
+            .expect("relative path should have a parent");
+        self.base_path.join(year)
+    }
+
+    /// Write the note, assuming its `<year>` directory exists
+    fn write_note(&self, note: &Note) -> Result<PathBuf> {
+        let relative_path = note.relative_path();
+        let full_path = &self.base_path.join(relative_path);
 
-        std::fs::write(full_path, &to_write)
+        // Note: std::fs::write opens the file, writes everything in one
+        // go and closes it - no need for an other buffer here
+        std::fs::write(full_path, note.dump())
             .map_err(|e| OSError(format!("While saving note in {full_path:?}: {e}")))?;
         Ok(relative_path.to_path_buf())
     }
+
+    /// Same as `write_note`, but fail instead of overwriting an
+    /// existing note
+    fn write_new_note(&self, note: &Note) -> Result<PathBuf> {
+        let relative_path = note.relative_path();
+        let full_path = &self.base_path.join(relative_path);
+
+        let mut file = std::fs::OpenOptions::new()
+            .write(true)
+            .create_new(true)
+            .open(full_path)
+            .map_err(|e| OSError(format!("While creating note in {full_path:?}: {e}")))?;
+        file.write_all(note.dump().as_bytes())
+            .map_err(|e| OSError(format!("While saving note in {full_path:?}: {e}")))?;
+        Ok(relative_path.to_path_buf())
+    }
+}
+
+/// Keep only the last note for each relative path, in the same order
+fn last_note_per_path<'a>(notes: &[&'a Note]) -> Vec<&'a Note> {
+    let mut last_indexes = HashMap::new();
+    for (i, note) in notes.iter().enumerate() {
+        last_indexes.insert(note.relative_path(), i);
+    }
+    notes
+        .iter()
+        .enumerate()
+        .filter(|(i, note)| last_indexes[note.relative_path()] == *i)
+        .map(|(_, note)| *note)
+        .collect()
+}
+
+/// Call `f` on each item, from one thread per CPU, and return
+/// the results in the same order as the items
+fn map_in_threads<T, U, F>(items: &[T], f: F) -> Result<Vec<U>>
+where
+    T: Sync,
+    U: Send,
+    F: Fn(&T) -> Result<U> + Sync,
+{
+    if items.is_empty() {
+        return Ok(vec![]);
+    }
+    let workers = std::thread::available_parallelism()
+        .map(|n| n.get())
+        .unwrap_or(1);
+    let chunk_size = items.len() / workers + 1;
+    let f = &f;
+    std::thread::scope(|scope| {
+        let handles: Vec<_> = items
+            .chunks(chunk_size)
+            .map(|chunk| scope.spawn(move || chunk.iter().map(f).collect::<Result<Vec<_>>>()))
+            .collect();
+        let mut res = Vec::with_capacity(items.len());
+        for handle in handles {
+            let chunk_res = handle.join().expect("worker thread should not panic")?;
+            res.extend(chunk_res);
+        }
+        Ok(res)
+    })
+}
+
+/// Create the `<year>` directory if it does not exist yet
+fn create_year_path(year_path: &Path) -> Result<()> {
+    // Note: a single call to stat() tells us whether the path
+    // exists and whether it is a directory
+    match std::fs::metadata(year_path) {
+        Ok(metadata) if metadata.is_dir() => Ok(()),
+        Ok(_) => Err(OSError(format!(
+            "Cannot use {year_path:?} as year path because there's a file here)"
+        ))),
+        Err(_) => {
+            println!("Creating {year_path:?}");
+            std::fs::create_dir_all(year_path).map_err(|e| {
+                OSError(format!(
+                    "While creating parent path {year_path:?} for note: {e}"
+                ))
+            })
+        }
+    }
 }
 
 #[cfg(test)]
@@ -470,26 +937,36 @@ mod tests {
     #[test]
     fn test_id_sorting() {
         let id1 = Id::from_str("20220707T142708").unwrap();
-        let id2 = Id::from_str("2022070lT142709").unwrap();
-        let id3 = Id::from_str("2022070lT142709").unwrap();
+        let id2 = Id::from_str("20220707T142709").unwrap();
+        let id3 = Id::from_str("20220707T142709").unwrap();
 
         assert_eq!(id2, id3);
         assert!(id1 < id2)
     }
 
+    #[test]
+    fn test_id_as_human_date() {
+        let id = Id::from_str("20220707T142708").unwrap();
+
+        assert_eq!(id.human_date(), "2022-07-07 14:27:08");
+    }
+
+    #[test]
+    fn test_invalid_ids() {
+        Id::from_str("bad").unwrap_err();
+        Id::from_str("20220707X142708").unwrap_err();
+        Id::from_str("2022070\u{e9}T14270").unwrap_err();
+        Id::from_str("2022070lT142709").unwrap_err();
+        Id::from_str("20221399T256199").unwrap_err();
+        Id::from_str("20220229T142708").unwrap_err();
+    }
+
     fn make_note() -> Note {
         let id = Id::from_str("20220707T142708").unwrap();
-        let slug = "this-is-a-title".to_owned();
         let title = "This is a title".to_owned();
         let keywords = vec!["k1".to_owned(), "k2".to_owned()];
         let extension = "md".to_owned();
-        let metadata = Metadata {
-            id,
-            slug,
-            title,
-            keywords,
-            extension,
-        };
+        let metadata = Metadata::new(id, title, keywords, extension);
 
         Note {
             metadata,
@@ -529,6 +1006,34 @@ mod tests {
         );
     }
 
+    #[test]
+    fn test_update_file_path_when_front_matter_changes() {
+        let mut note = make_note();
+        let front_matter = FrontMatter {
+            title: "New title".to_owned(),
+            date: note.metadata().id.human_date(),
+            keywords: "k3".to_owned(),
+        };
+
+        note.update(&front_matter);
+
+        assert_eq!(
+            note.relative_path().to_string_lossy(),
+            "2022/20220707T142708--new-title__k3.md"
+        );
+    }
+
+    #[test]
+    fn test_dump_note_after_front_matter_changes() {
+        let mut note = make_note();
+        let mut front_matter = note.front_matter();
+        front_matter.title = "New title".to_owned();
+
+        note.update(&front_matter);
+
+        assert!(note.dump().starts_with(&front_matter.dump()));
+    }
+
     #[test]
     fn test_error_when_trying_to_load_notes_from_a_file() {
         NotesRepository::open("src/lib.rs").unwrap_err();
@@ -549,6 +1054,148 @@ mod tests {
         assert_eq!(note, saved);
     }
 
+    #[test]
+    fn test_error_when_front_matter_is_unfinished() {
+        let id = Id::from_str("20220707T142708").unwrap();
+        let contents = "---\ntitle: Title\n".to_owned();
+
+        get_note_from_markdown(id, contents).unwrap_err();
+    }
+
+    #[test]
+    fn test_error_when_year_path_is_a_file() {
+        let temp_dir = tempfile::Builder::new()
+            .prefix("test-denotes")
+            .tempdir()
+            .unwrap();
+        std::fs::write(temp_dir.path().join("2022"), "").unwrap();
+        let notes = NotesRepository::open(&temp_dir).unwrap();
+
+        notes.save(&make_note()).unwrap_err();
+    }
+
+    #[test]
+    fn test_import_directory() {
+        let source_dir = tempfile::Builder::new()
+            .prefix("test-denotes-source")
+            .tempdir()
+            .unwrap();
+        let temp_dir = tempfile::Builder::new()
+            .prefix("test-denotes")
+            .tempdir()
+            .unwrap();
+        // Note: same title and keywords for all the notes, on purpose
+        for i in 0..3 {
+            let contents =
+                format!("---\ntitle: Same title\ndate: now\nkeywords: k1\n---\nNote {i}\n");
+            std::fs::write(source_dir.path().join(format!("note-{i}.md")), contents).unwrap();
+        }
+        std::fs::write(source_dir.path().join("not-a-note.txt"), "").unwrap();
+        std::fs::create_dir(source_dir.path().join("not-a-note.md")).unwrap();
+        let notes = NotesRepository::open(&temp_dir).unwrap();
+
+        let saved_paths = notes.import_directory(source_dir.path()).unwrap();
+
+        assert_eq!(saved_paths.len(), 3);
+        let ids: HashSet<_> = saved_paths
+            .iter()
+            .map(|saved_path| notes.load(saved_path).unwrap().id().to_owned())
+            .collect();
+        assert_eq!(ids.len(), 3);
+        let note = notes.load(&saved_paths[2]).unwrap();
+        assert_eq!(note.text(), "Note 2\n");
+    }
+
+    #[test]
+    fn test_import_with_two_repositories_on_the_same_directory() {
+        let source_dir = tempfile::Builder::new()
+            .prefix("test-denotes-source")
+            .tempdir()
+            .unwrap();
+        let temp_dir = tempfile::Builder::new()
+            .prefix("test-denotes")
+            .tempdir()
+            .unwrap();
+        for i in 0..3 {
+            let contents = format!("---\ntitle: Note {i}\ndate: now\nkeywords: k1\n---\n");
+            std::fs::write(source_dir.path().join(format!("note-{i}.md")), contents).unwrap();
+        }
+        // Note: both repositories are opened before the first import
+        let first = NotesRepository::open(&temp_dir).unwrap();
+        let second = NotesRepository::open(&temp_dir).unwrap();
+
+        let mut saved_paths = first.import_directory(source_dir.path()).unwrap();
+        saved_paths.push(
+            second
+                .import_from_markdown(&source_dir.path().join("note-0.md"))
+                .unwrap(),
+        );
+
+        let ids: HashSet<_> = saved_paths
+            .iter()
+            .map(|saved_path| first.load(saved_path).unwrap().id().to_owned())
+            .collect();
+        assert_eq!(ids.len(), 4);
+    }
+
+    #[test]
+    fn test_import_does_not_overwrite_existing_notes() {
+        let temp_dir = tempfile::Builder::new()
+            .prefix("test-denotes")
+            .tempdir()
+            .unwrap();
+        let notes = NotesRepository::open(&temp_dir).unwrap();
+        let note = make_note();
+        notes.save(&note).unwrap();
+
+        notes.write_new_note(&note).unwrap_err();
+    }
+
+    #[test]
+    fn test_save_many_notes() {
+        let temp_dir = tempfile::Builder::new()
+            .prefix("test-denotes")
+            .tempdir()
+            .unwrap();
+        let notes = NotesRepository::open(&temp_dir).unwrap();
+        let first = make_note();
+        let second = Note::new(
+            Metadata::new(
+                Id::from_str("20230101T101010").unwrap(),
+                "Second".to_owned(),
+                vec!["k1".to_owned()],
+                "md".to_owned(),
+            ),
+            "This is my second note".to_owned(),
+        );
+
+        let saved_paths = notes.save_many(&[&first, &second]).unwrap();
+
+        assert_eq!(saved_paths, [first.relative_path(), second.relative_path()]);
+        assert_eq!(notes.load(&saved_paths[1]).unwrap(), second);
+    }
+
+    #[test]
+    fn test_save_many_notes_with_the_same_path() {
+        let temp_dir = tempfile::Builder::new()
+            .prefix("test-denotes")
+            .tempdir()
+            .unwrap();
+        let notes = NotesRepository::open(&temp_dir).unwrap();
+        let longer = Note::new(
+            make_note().metadata,
+            "This is a much longer note\n".repeat(100),
+        );
+        let shorter = make_note();
+        let batch: Vec<&Note> = [&longer, &shorter].repeat(10);
+
+        let saved_paths = notes.save_many(&batch).unwrap();
+
+        assert_eq!(saved_paths.len(), 20);
+        assert_eq!(last_note_per_path(&batch), [&shorter]);
+        assert_eq!(notes.load(&saved_paths[0]).unwrap(), shorter);
+    }
+
     #[test]
     fn test_generating_front_matter() {
         let note = make_note();
@@ -559,6 +1206,69 @@ mod tests {
         assert_eq!(&parsed.title, &original.title);
     }
 
+    #[test]
+    fn test_parsing_front_matter() {
+        let front_matter = FrontMatter::parse(
+            "---\ntitle: 'It''s a \"title\"'\ndate: \"2022-07-07 14:27:08\"\nkeywords: k1 k2\n",
+        )
+        .unwrap();
+
+        assert_eq!(front_matter.title(), "It's a \"title\"");
+        assert_eq!(front_matter.date, "2022-07-07 14:27:08");
+        assert_eq!(front_matter.keywords(), &["k1", "k2"]);
+    }
+
+    #[test]
+    fn test_parsing_escape_sequences_in_front_matter() {
+        let front_matter =
+            FrontMatter::parse("title: \"a \\\"b\\\" \\\\ \\u00e9\"\ndate: d\nkeywords: k\n")
+                .unwrap();
+
+        assert_eq!(front_matter.title(), "a \"b\" \\ \u{e9}");
+    }
+
+    #[test]
+    fn test_error_when_front_matter_is_incomplete() {
+        FrontMatter::parse("title: one\nkeywords: k1\n").unwrap_err();
+        FrontMatter::parse("title: \"one\ndate: d\nkeywords: k1\n").unwrap_err();
+        FrontMatter::parse("title one\ndate: d\nkeywords: k1\n").unwrap_err();
+    }
+
+    #[test]
+    fn test_dumping_front_matter() {
+        let note = make_note();
+
+        assert_eq!(
+            note.front_matter().dump(),
+            "---\ntitle: This is a title\ndate: \"2022-07-07 14:27:08\"\nkeywords: k1 k2\n"
+        );
+    }
+
+    #[test]
+    fn test_front_matter_with_special_characters_roundtrip() {
+        for title in [
+            "",
+            "yes",
+            "42",
+            "- dash",
+            "a: b",
+            "\"quoted\" \\ \t\u{1}",
+            " padded ",
+            "no-break space\u{a0}",
+            "next line\u{85}",
+        ] {
+            let original = FrontMatter {
+                title: title.to_owned(),
+                date: "2022-07-07 14:27:08".to_owned(),
+                keywords: "k1 k2".to_owned(),
+            };
+
+            let parsed = FrontMatter::parse(&original.dump()).unwrap();
+
+            assert_eq!(parsed, original);
+        }
+    }
+
     #[test]
     #[ignore]
     fn test_load_front_matter_from_contents() {
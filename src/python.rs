@@ -1,10 +1,13 @@
+use std::collections::hash_map::DefaultHasher;
+use std::hash::{Hash, Hasher};
 use std::path::PathBuf;
 use std::str::FromStr;
 
 use pyo3::basic::CompareOp;
 use pyo3::exceptions::{PyOSError, PyValueError};
+use pyo3::once_cell::GILOnceCell;
 use pyo3::prelude::*;
-use pyo3::types::{PyDateTime, PyModule, PyTuple, PyType};
+use pyo3::types::{PyDateAccess, PyDateTime, PyModule, PyString, PyTimeAccess, PyTuple, PyType};
 
 fn unwrap<T>(result: crate::Result<T>) -> PyResult<T> {
     match result {
@@ -20,22 +23,54 @@ fn to_python_result<T>(error: crate::Error) -> PyResult<T> {
     }
 }
 
+// Used to implement __hash__ consistently with __eq__: the
+// wrapped values are immutable from Python
+fn hash_of(value: &impl Hash) -> isize {
+    let mut hasher = DefaultHasher::new();
+    value.hash(&mut hasher);
+    match hasher.finish() as isize {
+        // -1 is reserved for errors by CPython
+        -1 => -2,
+        h => h,
+    }
+}
+
+// Note: looked up once instead of importing pathlib every time a path
+// is returned to Python
+static PATH_CLASS: GILOnceCell<PyObject> = GILOnceCell::new();
+
+fn path_class(py: Python<'_>) -> PyResult<&'static PyObject> {
+    if let Some(path_class) = PATH_CLASS.get(py) {
+        return Ok(path_class);
+    }
+    let pathlib = PyModule::import(py, "pathlib")?;
+    let path_class = pathlib.getattr("Path")?.to_object(py);
+    // Note: set() only fails if the cell was filled in the meantime,
+    // with the same class
+    let _ = PATH_CLASS.set(py, path_class);
+    Ok(PATH_CLASS.get(py).expect("PATH_CLASS should be set"))
+}
+
 fn path_buf_to_pathlib(path_buf: PathBuf) -> PyResult<PyObject> {
     Python::with_gil(|py| {
-        let pathlib = PyModule::import(py, "pathlib")?;
-        let path_class = pathlib.getattr("Path")?;
+        let path_class = path_class(py)?;
         let args = PyTuple::new(py, &[path_buf.to_string_lossy().to_string()]);
-        let res = path_class.call1(args)?;
-        Ok(res.into())
+        path_class.call1(py, args)
     })
 }
 
+// Note: the same few keywords are used over and over across notes,
+// so let Python share a single str object for each of them
+fn intern_keywords<'py>(py: Python<'py>, keywords: &[String]) -> Vec<&'py PyString> {
+    keywords.iter().map(|k| PyString::intern(py, k)).collect()
+}
+
 #[pyfunction]
 fn slugify(title: &str) -> PyResult<String> {
     Ok(slug::slugify(title))
 }
 
-#[pyclass]
+#[pyclass(module = "denote")]
 struct Id {
     _inner: crate::Id,
 }
@@ -57,23 +92,17 @@ impl Id {
 
     #[classmethod]
     fn from_date(_cls: &PyType, date: &PyDateTime) -> PyResult<Self> {
-        let pystring = date
-            .str()
-            .expect("datetime.__str__ method should not throw");
-
-        let date_str = pystring
-            .to_str()
-            .expect("datetime.__str__ should not throw UnicodeDecode error");
-
-        // date_str looks like this:
-        //  2022-07-09 16:34:10.892856
-        let year = &date_str[0..4];
-        let month = &date_str[5..7];
-        let day = &date_str[8..10];
-        let hours = &date_str[11..13];
-        let minutes = &date_str[14..16];
-        let seconds = &date_str[17..19];
-        let id = format!("{year}{month}{day}T{hours}{minutes}{seconds}");
+        // Note: read the fields directly from the datetime struct
+        // instead of calling datetime.__str__ and slicing the result
+        let id = format!(
+            "{:04}{:02}{:02}T{:02}{:02}{:02}",
+            date.get_year(),
+            date.get_month(),
+            date.get_day(),
+            date.get_hour(),
+            date.get_minute(),
+            date.get_second()
+        );
         let id = unwrap(crate::Id::from_str(&id))?;
         Ok(Self { _inner: id })
     }
@@ -89,6 +118,15 @@ impl Id {
         })
     }
 
+    fn __hash__(&self) -> isize {
+        hash_of(&self._inner)
+    }
+
+    fn __reduce__(&self, py: Python<'_>) -> (PyObject, (String,)) {
+        let cls = py.get_type::<Id>().to_object(py);
+        (cls, (self._inner.as_str().to_string(),))
+    }
+
     fn __str__(slf: PyRef<'_, Self>) -> String {
         let res = slf._inner.as_str();
         res.to_string()
@@ -100,7 +138,7 @@ impl Id {
     }
 }
 
-#[pyclass]
+#[pyclass(module = "denote")]
 struct Metadata {
     _inner: crate::Metadata,
 }
@@ -135,8 +173,8 @@ impl Metadata {
     }
 
     #[getter]
-    fn keywords(&self) -> Vec<String> {
-        self._inner.keywords().to_vec()
+    fn keywords<'py>(&self, py: Python<'py>) -> Vec<&'py PyString> {
+        intern_keywords(py, self._inner.keywords())
     }
 
     #[getter]
@@ -155,6 +193,25 @@ impl Metadata {
         })
     }
 
+    fn __hash__(&self) -> isize {
+        hash_of(&self._inner)
+    }
+
+    fn __reduce__(&self, py: Python<'_>) -> (PyObject, (Id, String, Vec<String>, String)) {
+        let cls = py.get_type::<Metadata>().to_object(py);
+        let metadata = &self._inner;
+        let id = Id {
+            _inner: metadata.id.clone(),
+        };
+        let args = (
+            id,
+            metadata.title.clone(),
+            metadata.keywords.clone(),
+            metadata.extension.clone(),
+        );
+        (cls, args)
+    }
+
     fn __str__(slf: PyRef<'_, Self>) -> String {
         let metadata = &slf._inner;
         format!("{metadata:?}")
@@ -166,7 +223,7 @@ impl Metadata {
     }
 }
 
-#[pyclass]
+#[pyclass(module = "denote")]
 struct FrontMatter {
     _inner: crate::FrontMatter,
 }
@@ -179,8 +236,8 @@ impl FrontMatter {
     }
 
     #[getter]
-    fn keywords(&self) -> Vec<String> {
-        self._inner.keywords()
+    fn keywords<'py>(&self, py: Python<'py>) -> Vec<&'py PyString> {
+        intern_keywords(py, &self._inner.keywords())
     }
 
     fn dump(&self) -> String {
@@ -204,6 +261,15 @@ impl FrontMatter {
         })
     }
 
+    fn __hash__(&self) -> isize {
+        hash_of(&self._inner)
+    }
+
+    fn __reduce__(&self, py: Python<'_>) -> PyResult<(PyObject, (String,))> {
+        let parse = py.get_type::<FrontMatter>().getattr("parse")?;
+        Ok((parse.to_object(py), (self._inner.dump(),)))
+    }
+
     fn __str__(slf: PyRef<'_, Self>) -> String {
         let frontmatter = &slf._inner;
         format!("{frontmatter:?}")
@@ -221,7 +287,7 @@ fn get_note_from_markdown(id: &Id, contents: String) -> PyResult<Note> {
     Ok(Note { _inner: inner })
 }
 
-#[pyclass]
+#[pyclass(module = "denote")]
 struct Note {
     _inner: crate::Note,
 }
@@ -261,6 +327,11 @@ impl Note {
         self._inner.id()
     }
 
+    #[getter]
+    fn text(&self) -> &str {
+        self._inner.text()
+    }
+
     pub fn dump(&self) -> String {
         self._inner.dump()
     }
@@ -276,6 +347,18 @@ impl Note {
         })
     }
 
+    fn __hash__(&self) -> isize {
+        hash_of(&self._inner)
+    }
+
+    fn __reduce__(&self, py: Python<'_>) -> (PyObject, (Metadata, String)) {
+        let cls = py.get_type::<Note>().to_object(py);
+        let metadata = Metadata {
+            _inner: self._inner.metadata.clone(),
+        };
+        (cls, (metadata, self._inner.text.clone()))
+    }
+
     fn __str__(slf: PyRef<'_, Self>) -> String {
         let inner = &slf._inner;
         format!("{inner:?}")
@@ -315,29 +398,45 @@ impl NotesRepository {
         self._inner.base_path().to_string_lossy().to_string()
     }
 
-    fn import_from_markdown(&self, markdown_path: &PyAny) -> PyResult<PyObject> {
+    // Note: the GIL is released while reading and writing files,
+    // so that several notes can be imported, loaded or saved in parallel
+    // from Python threads (or with asyncio's `run_in_executor`)
+
+    fn import_from_markdown(&self, py: Python<'_>, markdown_path: &PyAny) -> PyResult<PyObject> {
         let as_path = PathBuf::from_str(&markdown_path.to_string())?;
-        let saved_path = unwrap(self._inner.import_from_markdown(&as_path))?;
+        let saved_path = unwrap(py.allow_threads(|| self._inner.import_from_markdown(&as_path)))?;
         path_buf_to_pathlib(saved_path)
     }
 
-    fn on_update(&self, relative_path: &PyAny) -> PyResult<PyObject> {
+    fn import_directory(&self, py: Python<'_>, source_path: &PyAny) -> PyResult<Vec<PyObject>> {
+        let as_path = PathBuf::from_str(&source_path.to_string())?;
+        let saved_paths = unwrap(py.allow_threads(|| self._inner.import_directory(&as_path)))?;
+        saved_paths.into_iter().map(path_buf_to_pathlib).collect()
+    }
+
+    fn on_update(&self, py: Python<'_>, relative_path: &PyAny) -> PyResult<PyObject> {
         let as_path = PathBuf::from_str(&relative_path.to_string())?;
-        let new_path = unwrap(self._inner.update(&as_path))?;
+        let new_path = unwrap(py.allow_threads(|| self._inner.update(&as_path)))?;
         path_buf_to_pathlib(new_path)
     }
 
-    fn load(&self, relative_path: &PyAny) -> PyResult<Note> {
+    fn load(&self, py: Python<'_>, relative_path: &PyAny) -> PyResult<Note> {
         let as_path = PathBuf::from_str(&relative_path.to_string())?;
-        let note = unwrap(self._inner.load(&as_path))?;
+        let note = unwrap(py.allow_threads(|| self._inner.load(&as_path)))?;
         Ok(Note { _inner: note })
     }
 
-    fn save(&self, note: &Note) -> PyResult<PyObject> {
-        let path = unwrap(self._inner.save(&note._inner))?;
+    fn save(&self, py: Python<'_>, note: &Note) -> PyResult<PyObject> {
+        let path = unwrap(py.allow_threads(|| self._inner.save(&note._inner)))?;
         path_buf_to_pathlib(path)
     }
 
+    fn save_many(&self, py: Python<'_>, notes: Vec<PyRef<'_, Note>>) -> PyResult<Vec<PyObject>> {
+        let inner_notes: Vec<&crate::Note> = notes.iter().map(|note| &note._inner).collect();
+        let saved_paths = unwrap(py.allow_threads(|| self._inner.save_many(&inner_notes)))?;
+        saved_paths.into_iter().map(path_buf_to_pathlib).collect()
+    }
+
     fn __str__(slf: PyRef<'_, Self>) -> String {
         let inner = &slf._inner;
         format!("{inner:?}")